@@ -30,20 +30,24 @@ fmap = TriLinearInterpolatedFieldMap(
         y_range=y_lim, ny=ny,
         z_range=z_lim, nz=nz,
         solver='FFTSolver3D')
-
-X, Y, Z = np.meshgrid(
-        fmap.x_grid, fmap.y_grid, fmap.z_grid,
-        indexing='ij')
-
-# Fill rho with Gaussian
-fmap.update_rho(1/(2*pi*sigma_x*sigma_y*sigma_z)*np.exp(
-    X**2/(-2*sigma_x**2) + Y**2/(-2*sigma_y**2) + Z**2/(-2*sigma_z**2)))
+context = fmap._buffer.context
+
+# Fill rho with Gaussian (separable, no need to build the full 3D meshgrid)
+a_x = -0.5/(sigma_x*sigma_x)
+a_y = -0.5/(sigma_y*sigma_y)
+a_z = -0.5/(sigma_z*sigma_z)
+gx = np.exp(a_x*fmap.x_grid*fmap.x_grid)
+gy = np.exp(a_y*fmap.y_grid*fmap.y_grid)
+gz = np.exp(a_z*fmap.z_grid*fmap.z_grid)
+fmap.update_rho(1/(2*pi*sigma_x*sigma_y*sigma_z)
+                * gx[:, None, None] * gy[None, :, None] * gz[None, None, :])
 
 phi = fmap.solver.solve(fmap.rho)
 fmap.update_phi(phi)
 
 x_list = np.linspace(x_lim[0], x_lim[1], 11)
-z_plot = np.linspace(z_lim[0], z_lim[1], 1000)
+# Single precision is enough for the probes used for plotting
+z_plot = np.linspace(z_lim[0], z_lim[1], 1000, dtype=np.float32)
 
 import matplotlib.pyplot as plt
 plt.close('all')
@@ -52,25 +56,36 @@ sp_phi = plt.subplot(3, 1, 1)
 sp_dphi_dz = plt.subplot(3, 1, 2, sharex=sp_phi)
 sp_simpl_corr = plt.subplot(3, 1, 3, sharex=sp_phi)
 
-rho_on_axis, _, _, _, dphi_dz_on_axis = fmap.get_values_at_points(0*z_plot, 0*z_plot, z_plot)
+# Probe coordinates are transferred to the context only once
+z_plot_dev = context.nparray_to_context_array(z_plot)
+zeros_z_plot_dev = context.zeros(shape=z_plot.shape, dtype=np.float32)
+rho_on_axis, _, _, _, dphi_dz_on_axis = [
+    context.nparray_from_context_array(vv)
+    for vv in fmap.get_values_at_points(
+        zeros_z_plot_dev, zeros_z_plot_dev, z_plot_dev)]
 
-lam = np.sum(fmap.rho, axis=(0, 1)) * fmap.dx * fmap.dy
-lam_prime = (lam[2:] - lam[:-2]) / (2*fmap.dz)
-lam_prime = np.concatenate([lam_prime[:1], lam_prime, lam_prime[-1:]])
+# Reduce on the context, only the line density (nz values) is transferred
+lam = context.nparray_from_context_array(
+    fmap.rho.sum(axis=(0, 1))) * fmap.dx * fmap.dy
+lam_prime = np.gradient(lam, fmap.dz)
 
 lam0 = np.max(lam)
 
 
 
-for x in x_list:
+# Probe all the lines with a single call (y is allocated on the context)
+x_probes = context.nparray_to_context_array(
+    np.repeat(x_list.astype(np.float32), len(z_plot)))
+z_probes = context.nparray_to_context_array(np.tile(z_plot, len(x_list)))
+y_probes = context.zeros(shape=x_probes.shape, dtype=np.float32)
+rho, phi, dphi_dx, dphi_dy, dphi_dz = [
+    context.nparray_from_context_array(vv).reshape(len(x_list), len(z_plot))
+    for vv in fmap.get_values_at_points(x_probes, y_probes, z_probes)]
 
-    x_plot = x * np.ones_like(z_plot)
-    y_plot = np.zeros_like(z_plot)
-
-    rho, phi, dphi_dx, dphi_dy, dphi_dz = fmap.get_values_at_points(x_plot, y_plot, z_plot)
-    sp_dphi_dz.plot(z_plot, dphi_dz, label=f'x = {x}')
-    sp_phi.plot(z_plot, phi, label=f'x = {x}')
-    sp_simpl_corr.plot(z_plot, dphi_dz-dphi_dz_on_axis, label=f'x = {x}')
+for ii, x in enumerate(x_list):
+    sp_dphi_dz.plot(z_plot, dphi_dz[ii], label=f'x = {x}')
+    sp_phi.plot(z_plot, phi[ii], label=f'x = {x}')
+    sp_simpl_corr.plot(z_plot, dphi_dz[ii]-dphi_dz_on_axis, label=f'x = {x}')
 
 
 plt.legend()
@@ -88,15 +103,17 @@ dx_integ = x_integ[1] - x_integ[0]
 dy_integ = y_integ[1] - y_integ[0]
 # r_integ = np.sqrt(x_integ**2 + y_integ**2)
 
-_, _, dphi_dx_integ, dphi_dy_integ, _ = fmap.get_values_at_points(x_integ, y_integ, 0*x_integ)
+_, _, dphi_dx_integ, dphi_dy_integ, _ = fmap.get_values_at_points(x_integ, y_integ, np.zeros_like(x_integ))
 # dphi_dr_integ = np.sqrt(dphi_dx_integ**2 + dphi_dy_integ**2) / lam0 # need to go to normalized potentional
 
 phi_corr = np.cumsum(dphi_dx_integ * dx_integ + dphi_dy_integ * dy_integ) / lam0
 # phi_corr[-1] *= 0.5
 dphi_dz_corr = lam_prime * phi_corr[-1]
 
-_, _, _, _, dphi_dz_check1 = fmap.get_values_at_points(x_corr + 0*fmap.z_grid, y_corr + 0*fmap.z_grid, fmap.z_grid)
-_, _, _, _, dphi_dz_check0 = fmap.get_values_at_points(0*fmap.z_grid, 0*fmap.z_grid, fmap.z_grid)
+zeros_z_grid = np.zeros_like(fmap.z_grid)
+_, _, _, _, dphi_dz_check1 = fmap.get_values_at_points(
+    np.full_like(fmap.z_grid, x_corr), np.full_like(fmap.z_grid, y_corr), fmap.z_grid)
+_, _, _, _, dphi_dz_check0 = fmap.get_values_at_points(zeros_z_grid, zeros_z_grid, fmap.z_grid)
 dphi_dz_corr_check = dphi_dz_check1 - dphi_dz_check0
 
 # z_list = np.linspace(z_lim[0], z_lim[1], 11)
@@ -104,13 +121,14 @@ dphi_dz_corr_check = dphi_dz_check1 - dphi_dz_check0
 
 # plt.figure(2)
 
-# for z in z_list:
-
-#     z_plot = z * np.ones_like(x_plot)
-#     y_plot = np.zeros_like(x_plot)
+# x_probes = np.tile(x_plot, len(z_list))
+# z_probes = np.repeat(z_list, len(x_plot))
+# y_probes = np.zeros_like(x_probes)
+# _, _, _, _, dphi_dz = fmap.get_values_at_points(x_probes, y_probes, z_probes)
+# dphi_dz = dphi_dz.reshape(len(z_list), len(x_plot))
 
-#     rho, phi, dphi_dx, dphi_dy, dphi_dz = fmap.get_values_at_points(x_plot, y_plot, z_plot)
-#     plt.plot(x_plot, dphi_dz, label=f'z = {z}')
+# for ii, z in enumerate(z_list):
+#     plt.plot(x_plot, dphi_dz[ii], label=f'z = {z}')
 
 plt.legend()
 plt.xlabel('x [m]')
@@ -0,0 +1,100 @@
+# copyright ################################# #
+# This file is part of the Xfields Package.   #
+# Copyright (c) CERN, 2021.                   #
+# ########################################### #
+
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import xobjects as xo
+import xfields as xf
+from xfields.solvers.fftsolvers import FFTSolver2p5D, _FFTPyvkfft
+from xobjects.test_helpers import for_all_test_contexts
+
+
+class _HostVkFFTApp:
+    """Stand-in for pyvkfft.opencl.VkFFTApp doing the transforms on the
+    host with numpy, used to test the solvers without pyvkfft."""
+
+    def __init__(self, shape, dtype, queue, axes=None, strides=None,
+                 inplace=True):
+        assert inplace
+        self.axes = axes
+
+    def _apply(self, data, fft):
+        res = fft(data.get(), axes=self.axes)
+        if data.flags.f_contiguous:
+            res = np.asfortranarray(res)
+        else:
+            res = np.ascontiguousarray(res)
+        data.set(res)
+
+    def fft(self, data):
+        self._apply(data, np.fft.fftn)
+
+    def ifft(self, data):
+        self._apply(data, np.fft.ifftn)
+
+
+def _check_fftsolver_pyvkfft(test_context, solver_class):
+
+    # The doubled grid (26 x 20 x 14) is not made of powers of two
+    nx, ny, nz = 13, 10, 7
+    dx, dy, dz = 1e-3, 2e-3, 1e-2
+
+    rng = np.random.default_rng(seed=2)
+    rho = np.asfortranarray(rng.uniform(0, 1, (nx, ny, nz)))
+
+    # Reference on the CPU context (np.fft based plan)
+    solver_ref = solver_class(dx=dx, dy=dy, dz=dz, nx=nx, ny=ny, nz=nz,
+                              context=xo.ContextCpu())
+    phi_ref = np.array(solver_ref.solve(rho))
+
+    solver = solver_class(dx=dx, dy=dy, dz=dz, nx=nx, ny=ny, nz=nz,
+                          context=test_context)
+    assert isinstance(solver.fftplan, _FFTPyvkfft)
+
+    phi = solver.solve(test_context.nparray_to_context_array(rho))
+    phi = test_context.nparray_from_context_array(phi.copy())
+
+    xo.assert_allclose(phi, phi_ref,
+                       rtol=1e-10, atol=1e-10*np.max(np.abs(phi_ref)))
+
+
+@for_all_test_contexts(excluding=('ContextCpu', 'ContextCupy'))
+@pytest.mark.parametrize('solver_class', [xf.FFTSolver3D, FFTSolver2p5D])
+def test_fftsolver_pyvkfft_plan(test_context, solver_class, monkeypatch):
+
+    pyvkfft = types.ModuleType('pyvkfft')
+    pyvkfft_opencl = types.ModuleType('pyvkfft.opencl')
+    pyvkfft_opencl.VkFFTApp = _HostVkFFTApp
+    pyvkfft.opencl = pyvkfft_opencl
+    monkeypatch.setitem(sys.modules, 'pyvkfft', pyvkfft)
+    monkeypatch.setitem(sys.modules, 'pyvkfft.opencl', pyvkfft_opencl)
+
+    _check_fftsolver_pyvkfft(test_context, solver_class)
+
+
+@for_all_test_contexts(excluding=('ContextCpu', 'ContextCupy'))
+@pytest.mark.parametrize('solver_class', [xf.FFTSolver3D, FFTSolver2p5D])
+def test_fftsolver_pyvkfft_non_power_of_two(test_context, solver_class):
+
+    pytest.importorskip('pyvkfft.opencl')
+
+    _check_fftsolver_pyvkfft(test_context, solver_class)
+
+
+@for_all_test_contexts(excluding=('ContextCpu', 'ContextCupy'))
+def test_fftsolver_pyopencl_non_power_of_two_without_pyvkfft(
+                                                test_context, monkeypatch):
+
+    # Make pyvkfft unavailable
+    monkeypatch.setitem(sys.modules, 'pyvkfft', None)
+    monkeypatch.setitem(sys.modules, 'pyvkfft.opencl', None)
+
+    with pytest.raises(ValueError, match='Dimension 0 .* has size 26'):
+        xf.FFTSolver3D(dx=1e-3, dy=2e-3, dz=1e-2, nx=13, ny=10, nz=7,
+                       context=test_context)
@@ -0,0 +1,93 @@
+# copyright ################################# #
+# This file is part of the Xfields Package.   #
+# Copyright (c) CERN, 2021.                   #
+# ########################################### #
+
+import numpy as np
+
+import xobjects as xo
+import xfields as xf
+from xobjects.test_helpers import for_all_test_contexts
+
+
+@for_all_test_contexts
+def test_get_values_at_points_single_precision(test_context):
+
+    fmap = xf.TriLinearInterpolatedFieldMap(
+            _context=test_context,
+            x_range=(-1., 1.), nx=11,
+            y_range=(-2., 2.), ny=13,
+            z_range=(-3., 3.), nz=15)
+
+    X, Y, Z = np.meshgrid(fmap.x_grid, fmap.y_grid, fmap.z_grid,
+                          indexing='ij')
+    fmap.update_rho(np.asfortranarray(X + 2*Y + 3*Z))
+    fmap.update_phi(np.asfortranarray(X*Y*Z))
+
+    rng = np.random.default_rng(seed=1)
+    x = rng.uniform(-1.2, 1.2, 100)
+    y = rng.uniform(-2.2, 2.2, 100)
+    z = rng.uniform(-3.2, 3.2, 100)
+
+    res_f64 = fmap.get_values_at_points(
+            x=test_context.nparray_to_context_array(x),
+            y=test_context.nparray_to_context_array(y),
+            z=test_context.nparray_to_context_array(z))
+    res_f32 = fmap.get_values_at_points(
+            x=test_context.nparray_to_context_array(x.astype(np.float32)),
+            y=test_context.nparray_to_context_array(y.astype(np.float32)),
+            z=test_context.nparray_to_context_array(z.astype(np.float32)))
+
+    assert len(res_f32) == len(res_f64) == 5
+    for vv_f64, vv_f32 in zip(res_f64, res_f32):
+        vv_f64 = test_context.nparray_from_context_array(vv_f64)
+        vv_f32 = test_context.nparray_from_context_array(vv_f32)
+        assert vv_f32.dtype == np.float32
+        xo.assert_allclose(vv_f32, vv_f64,
+                           rtol=1e-5, atol=1e-5*np.max(np.abs(vv_f64)))
+
+
+@for_all_test_contexts
+def test_get_values_at_points_after_copy_and_move(test_context):
+
+    fmap = xf.TriLinearInterpolatedFieldMap(
+            _context=test_context,
+            x_range=(-1., 1.), nx=11,
+            y_range=(-2., 2.), ny=13,
+            z_range=(-3., 3.), nz=15)
+
+    X, Y, Z = np.meshgrid(fmap.x_grid, fmap.y_grid, fmap.z_grid,
+                          indexing='ij')
+    fmap.update_rho(np.asfortranarray(X + 2*Y + 3*Z))
+    fmap.update_phi(np.asfortranarray(X*Y*Z + X))
+
+    x = test_context.nparray_to_context_array(np.array([0.13, -0.52]))
+    y = test_context.nparray_to_context_array(np.array([0.71, -1.33]))
+    z = test_context.nparray_to_context_array(np.array([-2.1, 1.4]))
+
+    # Populate the cache of the original map
+    res_ref = [test_context.nparray_from_context_array(vv)
+               for vv in fmap.get_values_at_points(x=x, y=y, z=z)]
+
+    # Copy into a shared buffer already holding other data, so that the
+    # maps of the copy are at different offsets
+    buf = test_context.new_buffer()
+    _ = xf.TriLinearInterpolatedFieldMap(
+            _buffer=buf,
+            x_range=(-1., 1.), nx=5,
+            y_range=(-1., 1.), ny=5,
+            z_range=(-1., 1.), nz=5)
+    fmap_copy = fmap.copy(_buffer=buf)
+    assert fmap_copy._buffer is buf
+
+    res_copy = [test_context.nparray_from_context_array(vv)
+                for vv in fmap_copy.get_values_at_points(x=x, y=y, z=z)]
+    for vv_ref, vv_copy in zip(res_ref, res_copy):
+        xo.assert_allclose(vv_copy, vv_ref, rtol=1e-14, atol=0)
+
+    # Move the original map into the shared buffer as well
+    fmap.move(_buffer=buf)
+    res_moved = [test_context.nparray_from_context_array(vv)
+                 for vv in fmap.get_values_at_points(x=x, y=y, z=z)]
+    for vv_ref, vv_moved in zip(res_ref, res_moved):
+        xo.assert_allclose(vv_moved, vv_ref, rtol=1e-14, atol=0)
@@ -273,15 +273,14 @@ class SpaceChargeBiGaussian(xt.BeamElement):
     def track(self, particles):
 
         if self._update_flag:
+            weights_active = particles.weight * (particles.state > 0)
             self.longitudinal_profile.number_of_particles = (
-                (particles.weight * (particles.state > 0)).sum()
+                weights_active.sum()
             )
             mean_x, sigma_x = mean_and_std(
-                    particles.x,
-                    weights=particles.weight * (particles.state>0))
+                    particles.x, weights=weights_active)
             mean_y, sigma_y = mean_and_std(
-                    particles.y,
-                    weights=particles.weight * (particles.state>0))
+                    particles.y, weights=weights_active)
             if self.update_mean_x_on_track:
                 self.mean_x = mean_x
             if self.update_mean_y_on_track:
@@ -104,7 +104,7 @@ class TempSlicer(xo.HybridClass):
                  _buffer=_buffer,
                  _offset=_offset)
 
-        self.compile_kernels(only_if_needed=False)
+        self.compile_kernels(only_if_needed=True)
 
     def rho(self, z):
         """
@@ -253,10 +253,10 @@ class TempSlicer(xo.HybridClass):
         bin_edges = context.nparray_to_context_array(self.bin_edges)
 
         if isinstance(context, xo.ContextCupy):
-            digitize = particles._context.nplike_lib.digitize  # only works with cpu and cupy
+            digitize = context.nplike_lib.digitize  # only works with cpu and cupy
             indices = digitize(particles.zeta, bin_edges, right=True)
         else:  # OpenMP implementation of binary search for CPU
-            indices = particles._context.nplike_lib.zeros_like(particles.zeta, dtype=particles._context.nplike_lib.int64)
+            indices = context.zeros(shape=particles.zeta.shape, dtype=np.int64)
             self._context.kernels.digitize(particles = particles, particles_zeta = particles.zeta,
                                                     bin_edges = bin_edges, n_slices = self.num_slices,
                                                     particles_slice = indices)
@@ -13,16 +13,23 @@ from ..solvers.fftsolvers import FFTSolver3D, FFTSolver2p5D, FFTSolver2p5DAverag
 from ..general import _pkg_root
 
 _TriLinearInterpolatedFielmap_kernels = {
-    'central_diff': xo.Kernel(
+    'central_diff_3d': xo.Kernel(
         args=[
             xo.Arg(xo.Int32,   pointer=False, name='nelem'),
-            xo.Arg(xo.Int32,   pointer=False, name='row_size'),
-            xo.Arg(xo.Int32,   pointer=False, name='stride_in_dbl'),
-            xo.Arg(xo.Float64, pointer=False, name='factor'),
+            xo.Arg(xo.Int32,   pointer=False, name='nx'),
+            xo.Arg(xo.Int32,   pointer=False, name='ny'),
+            xo.Arg(xo.Int32,   pointer=False, name='nz'),
+            xo.Arg(xo.Float64, pointer=False, name='factor_x'),
+            xo.Arg(xo.Float64, pointer=False, name='factor_y'),
+            xo.Arg(xo.Float64, pointer=False, name='factor_z'),
             xo.Arg(xo.Int8,    pointer=True,  name='matrix_buffer'),
             xo.Arg(xo.Int64,   pointer=False, name='matrix_offset'),
-            xo.Arg(xo.Int8,    pointer=True,  name='res_buffer'),
-            xo.Arg(xo.Int64,   pointer=False, name='res_offset'),
+            xo.Arg(xo.Int8,    pointer=True,  name='res_x_buffer'),
+            xo.Arg(xo.Int64,   pointer=False, name='res_x_offset'),
+            xo.Arg(xo.Int8,    pointer=True,  name='res_y_buffer'),
+            xo.Arg(xo.Int64,   pointer=False, name='res_y_offset'),
+            xo.Arg(xo.Int8,    pointer=True,  name='res_z_buffer'),
+            xo.Arg(xo.Int64,   pointer=False, name='res_z_offset'),
             ],
         n_threads='nelem'
         ),
@@ -80,6 +87,20 @@ _TriLinearInterpolatedFielmap_kernels = {
             ],
         n_threads='n_points'
         ),
+    'TriLinearInterpolatedFieldMap_interpolate_3d_map_vector_f32': xo.Kernel(
+        args=[
+            xo.Arg(xo.ThisClass, pointer=False, name='fmap'),
+            xo.Arg(xo.Int64,   pointer=False, name='n_points'),
+            xo.Arg(xo.Float32, pointer=True,  name='x'),
+            xo.Arg(xo.Float32, pointer=True,  name='y'),
+            xo.Arg(xo.Float32, pointer=True,  name='z'),
+            xo.Arg(xo.Int64,   pointer=False, name='n_quantities'),
+            xo.Arg(xo.Int8,    pointer=True,  name='buffer_mesh_quantities'),
+            xo.Arg(xo.Int64,   pointer=True,  name='offsets_mesh_quantities'),
+            xo.Arg(xo.Float32, pointer=True,  name='particles_quantities'),
+            ],
+        n_threads='n_points'
+        ),
     }
 
 
@@ -250,12 +271,17 @@ class TriLinearInterpolatedFieldMap(xo.HybridClass):
         """
         Returns the charge density, the field potential and its derivatives
         at the points specified by x, y, z. The output can be customized (see below).
-        Zeros are returned for points outside the grid.
+        Zeros are returned for points outside the grid. If the coordinates are
+        given in single precision (float32) the results are also returned in
+        single precision (the maps are still stored in double precision).
 
         Args:
-            x (float64 array): Horizontal coordinates at which the field is evaluated.
-            y (float64 array): Vertical coordinates at which the field is evaluated.
-            z (float64 array): Longitudinal coordinates at which the field is evaluated.
+            x (float64 or float32 array): Horizontal coordinates at which the
+                field is evaluated.
+            y (float64 or float32 array): Vertical coordinates at which the
+                field is evaluated.
+            z (float64 or float32 array): Longitudinal coordinates at which
+                the field is evaluated.
             return_rho (bool): If ``True``, the charge density at the given points is
                 returned.
             return_phi (bool): If ``True``, the potential at the given points is returned.
@@ -266,37 +292,48 @@ class TriLinearInterpolatedFieldMap(xo.HybridClass):
             return_dphi_dz: If ``True``, the longitudinal derivative of the potential
                 at the given points is returned.
         Returns:
-            (tuple of float64 array): The required quantities at the provided points.
+            (tuple of float64 or float32 array): The required quantities at the
+            provided points.
         """
 
         assert len(x) == len(y) == len(z)
-
-        pos_in_buffer_of_maps_to_interp = []
-        if return_rho:
-            pos_in_buffer_of_maps_to_interp.append(
-                    self._xobject.rho._offset + self._xobject.rho._data_offset)
-        if return_phi:
-            pos_in_buffer_of_maps_to_interp.append(
-                    self._xobject.phi._offset + self._xobject.phi._data_offset)
-        if return_dphi_dx:
-            pos_in_buffer_of_maps_to_interp.append(
-                    self._xobject.dphi_dx._offset + self._xobject.dphi_dx._data_offset)
-        if return_dphi_dy:
-            pos_in_buffer_of_maps_to_interp.append(
-                    self._xobject.dphi_dy._offset + self._xobject.dphi_dy._data_offset)
-        if return_dphi_dz:
-            pos_in_buffer_of_maps_to_interp.append(
-                    self._xobject.dphi_dz._offset + self._xobject.dphi_dz._data_offset)
+        assert x.dtype == y.dtype == z.dtype, (
+                    'x, y, z must have the same dtype')
+        single_precision = (x.dtype == np.float32)
 
         context = self._buffer.context
 
-        pos_in_buffer_of_maps_to_interp = context.nparray_to_context_array(
-                        np.array(pos_in_buffer_of_maps_to_interp, dtype=np.int64))
+        # The device array with the offsets is uploaded only once. It is
+        # looked up by the current offsets and reused only on the same
+        # context, so that copied or moved maps do not pick up stale values.
+        # The cache is created here as __init__ is not run on unpickling.
+        cache = getattr(self, '_offsets_mesh_quantities', None)
+        if cache is None:
+            cache = {}
+            self._offsets_mesh_quantities = cache
+        offsets = tuple(self._get_offsets_mesh_quantities(
+                    return_rho, return_phi, return_dphi_dx, return_dphi_dy,
+                    return_dphi_dz))
+        cached = cache.get(offsets, None)
+        if cached is not None and cached[0] is context:
+            pos_in_buffer_of_maps_to_interp = cached[1]
+        else:
+            pos_in_buffer_of_maps_to_interp = context.nparray_to_context_array(
+                                        np.array(offsets, dtype=np.int64))
+            cache[offsets] = (
+                                context, pos_in_buffer_of_maps_to_interp)
+
         nmaps_to_interp = len(pos_in_buffer_of_maps_to_interp)
-        buffer_out = context.zeros(
-                shape=(nmaps_to_interp * len(x),), dtype=np.float64)
+        buffer_out = context.zeros(shape=(nmaps_to_interp * len(x),),
+                dtype=(np.float32 if single_precision else np.float64))
+        if single_precision:
+            interpolate_kernel = (context.kernels
+                    .TriLinearInterpolatedFieldMap_interpolate_3d_map_vector_f32)
+        else:
+            interpolate_kernel = (context.kernels
+                    .TriLinearInterpolatedFieldMap_interpolate_3d_map_vector)
         if nmaps_to_interp > 0:
-            context.kernels.TriLinearInterpolatedFieldMap_interpolate_3d_map_vector(
+            interpolate_kernel(
                     fmap=self._xobject,
                     n_points=len(x),
                     x=x, y=y, z=z,
@@ -311,6 +348,28 @@ class TriLinearInterpolatedFieldMap(xo.HybridClass):
 
         return particles_quantities
 
+    def _get_offsets_mesh_quantities(self, return_rho, return_phi,
+                                     return_dphi_dx, return_dphi_dy,
+                                     return_dphi_dz):
+
+        offsets = []
+        if return_rho:
+            offsets.append(
+                    self._xobject.rho._offset + self._xobject.rho._data_offset)
+        if return_phi:
+            offsets.append(
+                    self._xobject.phi._offset + self._xobject.phi._data_offset)
+        if return_dphi_dx:
+            offsets.append(
+                    self._xobject.dphi_dx._offset + self._xobject.dphi_dx._data_offset)
+        if return_dphi_dy:
+            offsets.append(
+                    self._xobject.dphi_dy._offset + self._xobject.dphi_dy._data_offset)
+        if return_dphi_dz:
+            offsets.append(
+                    self._xobject.dphi_dz._offset + self._xobject.dphi_dz._data_offset)
+        return offsets
+
     #@profile
     def update_from_particles(self,
                         particles=None,
@@ -438,40 +497,27 @@ class TriLinearInterpolatedFieldMap(xo.HybridClass):
 
         context = self._buffer.context
 
-        # Compute gradient
-        context.kernels.central_diff(
-                nelem = self.phi.size,
-                row_size = self.nx,
-                stride_in_dbl = self.phi.strides[0]/8,
-                factor = 1/(2*self.dx),
-                matrix_buffer = self._xobject.phi._buffer.buffer,
-                matrix_offset = (self._xobject.phi._offset
-                               + self._xobject.phi._data_offset),
-                res_buffer = self._xobject.dphi_dx._buffer.buffer,
-                res_offset = (self._xobject.dphi_dx._offset
-                            + self._xobject.dphi_dx._data_offset))
-        context.kernels.central_diff(
-                nelem = self.phi.size,
-                row_size = self.ny,
-                stride_in_dbl = self.phi.strides[1]/8,
-                factor = 1/(2*self.dy),
-                matrix_buffer = self._xobject.phi._buffer.buffer,
-                matrix_offset = (self._xobject.phi._offset
-                               + self._xobject.phi._data_offset),
-                res_buffer = self._xobject.dphi_dy._buffer.buffer,
-                res_offset = (self._xobject.dphi_dy._offset
-                            + self._xobject.dphi_dy._data_offset))
-        context.kernels.central_diff(
+        # Compute gradient (all three components in a single pass)
+        context.kernels.central_diff_3d(
                 nelem = self.phi.size,
-                row_size = self.nz,
-                stride_in_dbl = self.phi.strides[2]/8,
-                factor = 1/(2*self.dz),
+                nx = self.nx,
+                ny = self.ny,
+                nz = self.nz,
+                factor_x = 1/(2*self.dx),
+                factor_y = 1/(2*self.dy),
+                factor_z = 1/(2*self.dz),
                 matrix_buffer = self._xobject.phi._buffer.buffer,
                 matrix_offset = (self._xobject.phi._offset
                                + self._xobject.phi._data_offset),
-                res_buffer = self._xobject.dphi_dz._buffer.buffer,
-                res_offset = (self._xobject.dphi_dz._offset
-                            + self._xobject.dphi_dz._data_offset))
+                res_x_buffer = self._xobject.dphi_dx._buffer.buffer,
+                res_x_offset = (self._xobject.dphi_dx._offset
+                              + self._xobject.dphi_dx._data_offset),
+                res_y_buffer = self._xobject.dphi_dy._buffer.buffer,
+                res_y_offset = (self._xobject.dphi_dy._offset
+                              + self._xobject.dphi_dy._data_offset),
+                res_z_buffer = self._xobject.dphi_dz._buffer.buffer,
+                res_z_offset = (self._xobject.dphi_dz._offset
+                              + self._xobject.dphi_dz._data_offset))
 
     #@profile
     def update_phi_from_rho(self, solver=None):
@@ -36,4 +36,67 @@ void central_diff(
 
 }
 
+/*gpukern*/
+void central_diff_3d(
+	      const int     nelem,
+	      const int     nx,
+	      const int     ny,
+	      const int     nz,
+	      const double  factor_x,
+	      const double  factor_y,
+	      const double  factor_z,
+/*gpuglmem*/  const int8_t* matrix_buffer,
+              const int64_t matrix_offset,
+/*gpuglmem*/        int8_t* res_x_buffer,
+                    int64_t res_x_offset,
+/*gpuglmem*/        int8_t* res_y_buffer,
+                    int64_t res_y_offset,
+/*gpuglmem*/        int8_t* res_z_buffer,
+                    int64_t res_z_offset
+              ){
+
+   // Computes the three derivatives of a Fortran-ordered (nx, ny, nz)
+   // matrix in a single pass (zero on the boundaries of each direction)
+
+   /*gpuglmem*/ const double* matrix = 
+	           (/*gpuglmem*/ double*) (matrix_buffer + matrix_offset); 
+   /*gpuglmem*/       double*  res_x = 
+	           (/*gpuglmem*/ double*) (res_x_buffer + res_x_offset); 
+   /*gpuglmem*/       double*  res_y = 
+	           (/*gpuglmem*/ double*) (res_y_buffer + res_y_offset); 
+   /*gpuglmem*/       double*  res_z = 
+	           (/*gpuglmem*/ double*) (res_z_buffer + res_z_offset); 
+
+   const int stride_y = nx;
+   const int stride_z = nx*ny;
+
+   for(int ii=0; ii<nelem; ii++){//vectorize_over ii nelem
+      const int ix = ii % nx;
+      const int iy = (ii / stride_y) % ny;
+      const int iz = ii / stride_z;
+
+      if (ix==0 || ix==nx-1){
+         res_x[ii] = 0;
+      }
+      else{
+         res_x[ii] = factor_x * (matrix[ii+1] - matrix[ii-1]);
+      }
+
+      if (iy==0 || iy==ny-1){
+         res_y[ii] = 0;
+      }
+      else{
+         res_y[ii] = factor_y * (matrix[ii+stride_y] - matrix[ii-stride_y]);
+      }
+
+      if (iz==0 || iz==nz-1){
+         res_z[ii] = 0;
+      }
+      else{
+         res_z[ii] = factor_z * (matrix[ii+stride_z] - matrix[ii-stride_z]);
+      }
+   }//end_vectorize 
+
+}
+
 #endif
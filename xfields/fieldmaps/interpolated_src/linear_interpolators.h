@@ -13,6 +13,9 @@ typedef struct{
     int64_t nx;
     int64_t ny;
     int64_t nz;
+    int64_t i000;   // flat index of the (ix, iy, iz) corner
+    int64_t sy;     // flat index step along y
+    int64_t sz;     // flat index step along z
     double w000;
     double w100;
     double w010;
@@ -44,6 +47,8 @@ IndicesAndWeights TriLinearInterpolatedFieldMap_compute_indeces_and_weights(
     	iw.nx = nx;
     	iw.ny = ny;
     	iw.nz = nz;
+    	iw.sy = nx;
+    	iw.sz = nx * ny;
 
     	// indices
     	iw.ix = floor((x - x0) / dx);
@@ -54,25 +59,38 @@ IndicesAndWeights TriLinearInterpolatedFieldMap_compute_indeces_and_weights(
     	if (iw.ix >= 0 && iw.ix < nx - 1 && iw.iy >= 0 && iw.iy < ny - 1
 	    	    && iw.iz >= 0 && iw.iz < nz - 1){
 
+    	    // corner address, shared by all the interpolated maps
+    	    iw.i000 = iw.ix + iw.iy * iw.sy + iw.iz * iw.sz;
+
     	    // distances
     	    const double dxi = x - (x0 + iw.ix * dx);
     	    const double dyi = y - (y0 + iw.iy * dy);
     	    const double dzi = z - (z0 + iw.iz * dz);
 	    
+    	    // fractional positions in the cell
+    	    const double ax = dxi/dx;
+    	    const double ay = dyi/dy;
+    	    const double az = dzi/dz;
+    	    const double wy0z0 = (1.-ay) * (1.-az);
+    	    const double wy1z0 = ay      * (1.-az);
+    	    const double wy0z1 = (1.-ay) * az;
+    	    const double wy1z1 = ay      * az;
+
     	    // weights
-    	    iw.w000 = (1.-dxi/dx) * (1.-dyi/dy) * (1.-dzi/dz);
-    	    iw.w100 = (dxi/dx)    * (1.-dyi/dy) * (1.-dzi/dz);
-    	    iw.w010 = (1.-dxi/dx) * (dyi/dy)    * (1.-dzi/dz);
-    	    iw.w110 = (dxi/dx)    * (dyi/dy)    * (1.-dzi/dz);
-    	    iw.w001 = (1.-dxi/dx) * (1.-dyi/dy) * (dzi/dz);
-    	    iw.w101 = (dxi/dx)    * (1.-dyi/dy) * (dzi/dz);
-    	    iw.w011 = (1.-dxi/dx) * (dyi/dy)    * (dzi/dz);
-    	    iw.w111 = (dxi/dx)    * (dyi/dy)    * (dzi/dz);
+    	    iw.w000 = (1.-ax) * wy0z0;
+    	    iw.w100 = ax      * wy0z0;
+    	    iw.w010 = (1.-ax) * wy1z0;
+    	    iw.w110 = ax      * wy1z0;
+    	    iw.w001 = (1.-ax) * wy0z1;
+    	    iw.w101 = ax      * wy0z1;
+    	    iw.w011 = (1.-ax) * wy1z1;
+    	    iw.w111 = ax      * wy1z1;
 	}
 	else{
             iw.ix = -999; 
             iw.iy = -999; 
             iw.iz = -999; 
+            iw.i000 = 0;
 	}
 	return iw;
 
@@ -89,15 +107,16 @@ double TriLinearInterpolatedFieldMap_interpolate_3d_map_scalar(
 	 val = 0.;
     }
     else{
+	/*gpuglmem*/ const double* m = map + iw.i000;
 	val = 
-    	       iw.w000 * map[iw.ix   + (iw.iy  ) * iw.nx + (iw.iz  ) * iw.nx * iw.ny]
-    	     + iw.w100 * map[iw.ix+1 + (iw.iy  ) * iw.nx + (iw.iz  ) * iw.nx * iw.ny]
-    	     + iw.w010 * map[iw.ix+  + (iw.iy+1) * iw.nx + (iw.iz  ) * iw.nx * iw.ny]
-    	     + iw.w110 * map[iw.ix+1 + (iw.iy+1) * iw.nx + (iw.iz  ) * iw.nx * iw.ny]
-    	     + iw.w001 * map[iw.ix   + (iw.iy  ) * iw.nx + (iw.iz+1) * iw.nx * iw.ny]
-    	     + iw.w101 * map[iw.ix+1 + (iw.iy  ) * iw.nx + (iw.iz+1) * iw.nx * iw.ny]
-    	     + iw.w011 * map[iw.ix+  + (iw.iy+1) * iw.nx + (iw.iz+1) * iw.nx * iw.ny]
-    	     + iw.w111 * map[iw.ix+1 + (iw.iy+1) * iw.nx + (iw.iz+1) * iw.nx * iw.ny];
+    	       iw.w000 * m[0                ]
+    	     + iw.w100 * m[1                ]
+    	     + iw.w010 * m[    iw.sy        ]
+    	     + iw.w110 * m[1 + iw.sy        ]
+    	     + iw.w001 * m[            iw.sz]
+    	     + iw.w101 * m[1 +         iw.sz]
+    	     + iw.w011 * m[    iw.sy + iw.sz]
+    	     + iw.w111 * m[1 + iw.sy + iw.sz];
     }
 
     return val;
@@ -129,4 +148,33 @@ void TriLinearInterpolatedFieldMap_interpolate_3d_map_vector(
 	}
     }//end_vectorize
 }
+
+/*gpukern*/
+void TriLinearInterpolatedFieldMap_interpolate_3d_map_vector_f32(
+    TriLinearInterpolatedFieldMapData  fmap,
+                        const int64_t  n_points,
+           /*gpuglmem*/ const float*   x,
+           /*gpuglmem*/ const float*   y,
+           /*gpuglmem*/ const float*   z,
+                        const int64_t  n_quantities,
+           /*gpuglmem*/ const int8_t*  buffer_mesh_quantities,
+           /*gpuglmem*/ const int64_t* offsets_mesh_quantities,
+           /*gpuglmem*/       float*   particles_quantities) {
+
+    // Same as above with single precision coordinates and results
+    // (the maps and the weights are kept in double precision)
+    #pragma omp parallel for //only_for_context cpu_openmp 
+    for (int pidx=0; pidx<n_points; pidx++){ //vectorize_over pidx n_points
+
+	const IndicesAndWeights iw = 
+		TriLinearInterpolatedFieldMap_compute_indeces_and_weights(
+	                                      fmap, x[pidx], y[pidx], z[pidx]);
+    	for (int iq=0; iq<n_quantities; iq++){
+	    particles_quantities[iq*n_points + pidx] = (float)
+		TriLinearInterpolatedFieldMap_interpolate_3d_map_scalar(
+	           (/*gpuglmem*/ double*)(buffer_mesh_quantities + offsets_mesh_quantities[iq]),
+		   iw);
+	}
+    }//end_vectorize
+}
 #endif
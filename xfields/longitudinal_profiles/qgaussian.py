@@ -171,7 +171,7 @@ class LongitudinalProfileQGaussian(xo.HybridClass):
         context = self._buffer.context
         res = context.zeros(len(z), dtype=np.float64)
 
-        if 'line_density_q_gauss' not in context.kernels.keys():
+        if 'line_density_qgauss' not in context.kernels.keys():
             self.compile_kernels()
 
         context.kernels.line_density_qgauss(prof=self._xobject, n=len(z), z=z, res=res)
@@ -9,7 +9,7 @@ from numpy import pi
 
 from .base import Solver
 
-from xobjects import context_default
+from xobjects import context_default, ContextPyopencl
 
 class FFTSolver2D(Solver):
 
@@ -42,9 +42,9 @@ class FFTSolver3D(Solver):
 
         self.context = context
 
-        # Prepare arrays
-        workspace_dev = context.nparray_to_context_array(
-                    np.zeros((2*nx, 2*ny, 2*nz), dtype=np.complex128, order='F'))
+        # Prepare arrays (allocated directly on the device, no transfer needed)
+        workspace_dev = context.zeros(
+                    (2*nx, 2*ny, 2*nz), dtype=np.complex128, order='F')
 
 
         # Build grid for primitive function
@@ -86,11 +86,20 @@ class FFTSolver3D(Solver):
 
         # Prepare fft plan
         if fftplan is None:
-            fftplan = context.plan_FFT(workspace_dev, axes=(0,1,2))
+            fftplan = _plan_fft(context, workspace_dev, axes=(0,1,2))
 
         # Transform the green function (in place)
         fftplan.transform(gint_rep_dev)
 
+        # The replicated Green function is even along all axes, hence its
+        # transform is real. Only the real part is kept, which halves the
+        # memory and the data read by the multiplication in the solve.
+        gint_rep_transf_dev = gint_rep_dev.real
+        if not isinstance(context, ContextPyopencl):
+            # numpy and cupy return a strided view of the complex array
+            gint_rep_transf_dev = gint_rep_transf_dev.copy(order='F')
+        del(gint_rep_dev)
+
         self.dx = dx
         self.dy = dy
         self.dz = dz
@@ -98,7 +107,7 @@ class FFTSolver3D(Solver):
         self.ny = ny
         self.nz = nz
         self._workspace_dev = workspace_dev
-        self._gint_rep_transf_dev = gint_rep_dev
+        self._gint_rep_transf_dev = gint_rep_transf_dev
         self.fftplan = fftplan
 
     #@profile
@@ -188,11 +197,11 @@ class FFTSolver2p5D(FFTSolver3D):
         if fftplan is None:
             temp_dev = context.zeros((2*nx, 2*ny, nz),
                                     dtype=np.complex128, order='F')
-            fftplan = context.plan_FFT(temp_dev, axes=(0,1))
+            fftplan = _plan_fft(context, temp_dev, axes=(0,1))
             del(temp_dev)
 
-        # Transform the green function
-        gint_rep_transf = np.fft.fftn(gint_rep, axes=(0,1))
+        # Transform the green function (real, as the replicas make it even)
+        gint_rep_transf = np.fft.fftn(gint_rep, axes=(0,1)).real.copy(order='K')
 
         # Transfer to GPU (if needed)
         gint_rep_transf_dev = context.nparray_to_context_array(
@@ -243,11 +252,11 @@ class FFTSolver2p5DAveraged(Solver):
         if fftplan is None:
             temp_dev = context.zeros((2*nx, 2*ny),
                                     dtype=np.complex128, order='F')
-            fftplan = context.plan_FFT(temp_dev, axes=(0,1))
+            fftplan = _plan_fft(context, temp_dev, axes=(0,1))
             del(temp_dev)
 
-        # Transform the green function
-        gint_rep_transf = np.fft.fftn(gint_rep, axes=(0,1))
+        # Transform the green function (real, as the replicas make it even)
+        gint_rep_transf = np.fft.fftn(gint_rep, axes=(0,1)).real.copy(order='K')
 
         # Transfer to GPU (if needed)
         gint_rep_transf_dev = context.nparray_to_context_array(
@@ -278,7 +287,7 @@ class FFTSolver2p5DAveraged(Solver):
         _workspace_dev = self.context.zeros(
                 (2*self.nx, 2*self.ny), dtype=np.complex128, order='F')
 
-        sum_rho_xy = rho.sum(axis=0).sum(axis=0)
+        sum_rho_xy = rho.sum(axis=(0, 1))
         sum_rho = sum_rho_xy.sum()
         _workspace_dev[:self.nx, :self.ny] = rho.sum(axis=2)
         self.fftplan.transform(_workspace_dev) # rho_rep_hat
@@ -298,6 +307,62 @@ class FFTSolver2p5DAveraged(Solver):
 
         return phi
 
+class _FFTPyvkfft:
+
+    """
+    FFT plan for the PyOpenCL context based on VkFFT. Differently from the
+    clFFT based plan provided by the context, it supports arbitrary
+    dimensions (not only powers of two).
+    """
+
+    def __init__(self, context, data, axes):
+
+        from pyvkfft.opencl import VkFFTApp
+
+        assert len(data.shape) > max(axes)
+
+        self.context = context
+        self.axes = axes
+        self._app = VkFFTApp(data.shape, data.dtype, queue=context.queue,
+                             axes=axes, strides=data.strides, inplace=True)
+
+    def transform(self, data):
+        """The transform is done inplace"""
+        self._app.fft(data)
+
+    def itransform(self, data):
+        """The transform is done inplace"""
+        self._app.ifft(data)
+
+def _plan_fft(context, data, axes):
+
+    """
+    Builds the FFT plan used by the solvers. On the PyOpenCL context a VkFFT
+    plan is used if pyvkfft is installed. The context's own (clFFT) plan is
+    used instead if pyvkfft is not installed or if VkFFT cannot build a plan
+    for the given array and device (e.g. no double precision support), in
+    which case VkFFT raises a RuntimeError. Errors raised later, when the
+    transforms are executed, are not covered by this fallback.
+    """
+
+    if isinstance(context, ContextPyopencl):
+        try:
+            return _FFTPyvkfft(context, data, axes)
+        except (ImportError, RuntimeError) as err:
+            # The context's plan (clFFT) requires all dimensions apart from
+            # the last to be powers of two
+            for ii in axes[:-1]:
+                nn = data.shape[ii]
+                if not (nn > 0 and (nn & (nn - 1)) == 0):
+                    raise ValueError(
+                        f'Dimension {ii} of the FFT grid (padded to twice '
+                        f'the number of cells) has size {nn}, which is not '
+                        'a power of two, as required by the PyOpenCL FFT. '
+                        'A VkFFT plan could not be used instead '
+                        f'({type(err).__name__}: {err}).') from err
+
+    return context.plan_FFT(data, axes=axes)
+
 def primitive_func_3d(x,y,z):
     abs_r = np.sqrt(x * x + y * y + z * z)
     inv_abs_r = 1./abs_r